@@ -0,0 +1,20 @@
+"""
+Numba decorators with a pure-Python fallback.
+
+Kernels are compiled with cache=True so the compiled code persists between
+runs. Without numba installed, njit is a no-op decorator and prange is range,
+so the same kernels still run (slowly) as plain Python.
+"""
+try:
+    from numba import njit, prange
+except ImportError:
+    def njit(*args, **kwargs):
+        # Bare @njit receives the function; @njit(...) receives options
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+# Fast-math flags that keep NaN/inf semantics, so NaN "not ready" checks still work
+FASTMATH = {"nsz", "arcp", "contract", "afn"}
@@ -0,0 +1,240 @@
+"""
+Offline simulation of the MSFTBeatBuyHoldV4 position sizing.
+
+Mirrors the decision logic in main.py (12-month momentum, 20-day realized
+vol, SMA trend regime, RSI adjustments) as a Numba kernel over daily
+arrays, so parameter sweeps can run on QC-exported price/indicator CSVs
+without going through LEAN. simulate_fused() needs only closes and does
+the whole indicator/signal pipeline in one pass. The QCAlgorithm in main.py
+stays the production path for the single tuned config.
+"""
+import math
+
+import numpy as np
+
+from _njit import FASTMATH, njit, prange
+
+LOOKBACK_12M = 252
+VOL_WINDOW = 20
+
+# Layout of the params vector, named after the algorithm attributes
+PARAM_NAMES = (
+    "target_vol",
+    "max_leverage",
+    "base_leverage",
+    "strong_trend_leverage",
+    "vol_floor",
+    "min_strong_leverage",
+    "moderate_min_leverage",
+    "moderate_max_leverage",
+    "rsi_dip_threshold",
+    "rsi_dip_mult",
+    "rsi_overbought_threshold",
+    "rsi_overbought_mult",
+)
+
+
+def to_float32(*arrays):
+    """Cast daily price/indicator arrays to the contiguous float32 the kernels expect"""
+    return tuple(np.ascontiguousarray(a, dtype=np.float32) for a in arrays)
+
+
+def params_from(algorithm):
+    """Pack the sizing parameters of an algorithm instance into a params vector"""
+    return np.array([getattr(algorithm, name) for name in PARAM_NAMES], dtype=np.float64)
+
+
+def indicators(prices):
+    """float32 prices plus the SMA200, SMA50 and RSI inputs simulate() expects"""
+    (prices,) = to_float32(prices)
+    return prices, _rolling_sma(prices, 200), _rolling_sma(prices, 50), _rsi_wilders(prices, 14)
+
+
+@njit(cache=True, fastmath=FASTMATH)
+def _rolling_sma(x, window):
+    """Simple moving average from a running sum; NaN until the window is full"""
+    out = np.full(x.shape[0], np.nan, dtype=np.float32)
+    total = 0.0
+    for i in range(x.shape[0]):
+        total += float(x[i])
+        if i >= window:
+            total -= float(x[i - window])
+        if i >= window - 1:
+            out[i] = total / window
+    return out
+
+
+@njit(cache=True, fastmath=FASTMATH)
+def _rsi_wilders(x, period):
+    """Wilder's RSI seeded with the simple average of the first period moves, as in main.py"""
+    out = np.full(x.shape[0], np.nan, dtype=np.float32)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, x.shape[0]):
+        delta = float(x[i]) - float(x[i - 1])
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if i <= period:
+            avg_gain += (gain - avg_gain) / i
+            avg_loss += (loss - avg_loss) / i
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if i >= period:
+            out[i] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit(cache=True, fastmath=FASTMATH)
+def _target_weight(price, momentum, realized_vol, sma200, sma50, rsi, params):
+    """rebalance() sizing for one bar; params laid out as PARAM_NAMES"""
+    target_vol = params[0]
+    max_leverage = params[1]
+    base_leverage = params[2]
+    strong_trend_leverage = params[3]
+    vol_floor = params[4]
+    min_strong_leverage = params[5]
+    moderate_min_leverage = params[6]
+    moderate_max_leverage = params[7]
+    rsi_dip_threshold = params[8]
+    rsi_dip_mult = params[9]
+    rsi_overbought_threshold = params[10]
+    rsi_overbought_mult = params[11]
+
+    if momentum <= 0 or price <= sma200:
+        return 0.0
+
+    if price > sma50 and sma50 > sma200:
+        leverage = strong_trend_leverage
+        lo = min_strong_leverage
+        hi = max_leverage
+        if rsi < rsi_dip_threshold:
+            rsi_mult = rsi_dip_mult
+        elif rsi > rsi_overbought_threshold:
+            rsi_mult = rsi_overbought_mult
+        else:
+            rsi_mult = 1.0
+    else:
+        leverage = base_leverage
+        lo = moderate_min_leverage
+        hi = moderate_max_leverage
+        rsi_mult = 1.0
+
+    vol_scalar = target_vol / max(realized_vol, vol_floor)
+    position = min(max(leverage * vol_scalar, lo), hi)
+    return min(max(position * rsi_mult, lo), hi)
+
+
+@njit("float64[:](float32[:], float32[:], float32[:], float32[:], float64[:])",
+      cache=True, fastmath=FASTMATH)
+def simulate(prices, sma200, sma50, rsi, params):
+    """
+    Target MSFT weight for every bar, as rebalance() would compute it
+    NaN where momentum, vol or any indicator (NaN input) is not ready yet
+    Bar arrays are float32 (see to_float32); values are read as float64
+    """
+    n = prices.shape[0]
+    weights = np.full(n, np.nan)
+    ann = math.sqrt(252.0)
+    ret_sum = 0.0
+    ret_sumsq = 0.0
+
+    for i in range(1, n):
+        # Running sums over the last VOL_WINDOW daily returns
+        r = float(prices[i]) / float(prices[i - 1]) - 1
+        ret_sum += r
+        ret_sumsq += r * r
+        if i > VOL_WINDOW:
+            old = float(prices[i - VOL_WINDOW]) / float(prices[i - VOL_WINDOW - 1]) - 1
+            ret_sum -= old
+            ret_sumsq -= old * old
+
+        if i < LOOKBACK_12M or np.isnan(sma200[i]) or np.isnan(sma50[i]) or np.isnan(rsi[i]):
+            continue
+
+        price = float(prices[i])
+        momentum = price / float(prices[i - LOOKBACK_12M]) - 1
+        mean = ret_sum / VOL_WINDOW
+        realized_vol = math.sqrt(max(0.0, ret_sumsq / VOL_WINDOW - mean * mean)) * ann
+        weights[i] = _target_weight(price, momentum, realized_vol,
+                                    float(sma200[i]), float(sma50[i]), float(rsi[i]), params)
+
+    return weights
+
+
+@njit("float64[:](float32[:], float64[:])", cache=True, fastmath=FASTMATH)
+def simulate_fused(prices, params):
+    """
+    simulate() fed straight from closes: the SMA sums, Wilder's RSI, vol sums
+    and sizing are all updated in the same single pass over prices
+    """
+    n = prices.shape[0]
+    weights = np.full(n, np.nan)
+    ann = math.sqrt(252.0)
+    rsi_period = 14
+    sum200 = 0.0
+    sum50 = 0.0
+    ret_sum = 0.0
+    ret_sumsq = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+
+    for i in range(n):
+        price = float(prices[i])
+        sum200 += price
+        sum50 += price
+        if i >= 200:
+            sum200 -= float(prices[i - 200])
+        if i >= 50:
+            sum50 -= float(prices[i - 50])
+        if i == 0:
+            continue
+
+        prev = float(prices[i - 1])
+        r = price / prev - 1
+        ret_sum += r
+        ret_sumsq += r * r
+        if i > VOL_WINDOW:
+            old = float(prices[i - VOL_WINDOW]) / float(prices[i - VOL_WINDOW - 1]) - 1
+            ret_sum -= old
+            ret_sumsq -= old * old
+
+        delta = price - prev
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if i <= rsi_period:
+            avg_gain += (gain - avg_gain) / i
+            avg_loss += (loss - avg_loss) / i
+        else:
+            avg_gain = (avg_gain * (rsi_period - 1) + gain) / rsi_period
+            avg_loss = (avg_loss * (rsi_period - 1) + loss) / rsi_period
+
+        if i < LOOKBACK_12M or i < 199 or i < rsi_period:
+            continue
+
+        rsi = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        momentum = price / float(prices[i - LOOKBACK_12M]) - 1
+        mean = ret_sum / VOL_WINDOW
+        realized_vol = math.sqrt(max(0.0, ret_sumsq / VOL_WINDOW - mean * mean)) * ann
+        weights[i] = _target_weight(price, momentum, realized_vol,
+                                    sum200 / 200, sum50 / 50, rsi, params)
+
+    return weights
+
+
+@njit(parallel=True, cache=True, fastmath=FASTMATH)
+def sweep(prices, sma200, sma50, rsi, param_grid):
+    """Run simulate() for every row of param_grid; returns (n_params, n_bars) weights"""
+    out = np.empty((param_grid.shape[0], prices.shape[0]))
+    for k in prange(param_grid.shape[0]):
+        out[k] = simulate(prices, sma200, sma50, rsi, param_grid[k])
+    return out
+
+
+@njit(parallel=True, cache=True, fastmath=FASTMATH)
+def sweep_fused(prices, param_grid):
+    """Run simulate_fused() for every row of param_grid; returns (n_params, n_bars) weights"""
+    out = np.empty((param_grid.shape[0], prices.shape[0]))
+    for k in prange(param_grid.shape[0]):
+        out[k] = simulate_fused(prices, param_grid[k])
+    return out
@@ -1,8 +1,50 @@
 # region imports
 from AlgorithmImports import *
+import math
 import numpy as np
+from collections import deque
 # endregion
 
+class DualSMA(PythonIndicator):
+    """
+    50- and 200-day SMAs from one shared ring buffer
+    Both running sums are updated in O(1) per bar; value is the long SMA
+    """
+
+    def __init__(self, name, short_period=50, long_period=200):
+        super().__init__()
+        self.name = name
+        self.value = 0
+        self.warm_up_period = long_period
+        self.short_period = short_period
+        self.long_period = long_period
+        self.sma50 = 0.0
+        self.sma200 = 0.0
+        self._buf = np.empty(long_period)
+        self._head = 0
+        self._count = 0
+        self._sum_short = 0.0
+        self._sum_long = 0.0
+
+    def update(self, input):
+        price = input.value
+        buf, head = self._buf, self._head
+        if self._count >= self.long_period:
+            self._sum_long -= buf[head]
+        if self._count >= self.short_period:
+            self._sum_short -= buf[(head - self.short_period) % self.long_period]
+        buf[head] = price
+        self._sum_long += price
+        self._sum_short += price
+        self._head = (head + 1) % self.long_period
+        self._count += 1
+
+        self.sma50 = self._sum_short / min(self._count, self.short_period)
+        self.sma200 = self._sum_long / min(self._count, self.long_period)
+        self.value = self.sma200
+        return self._count >= self.long_period
+
+
 class MSFTBeatBuyHoldV4(QCAlgorithm):
     """
     Strategy V4: Optimized Vol-Scaled Momentum
@@ -26,16 +68,30 @@ class MSFTBeatBuyHoldV4(QCAlgorithm):
         self.msft.set_data_normalization_mode(DataNormalizationMode.ADJUSTED)
         
         # Trend indicators
-        self.sma_200 = self.sma("MSFT", 200, Resolution.DAILY)
-        self.sma_50 = self.sma("MSFT", 50, Resolution.DAILY)
+        self.dual_sma = DualSMA("MSFT_SMA_50_200", 50, 200)
+        self.register_indicator("MSFT", self.dual_sma, Resolution.DAILY)
         
-        # RSI for timing
-        self.rsi_indicator = self.rsi("MSFT", 14, MovingAverageType.WILDERS, Resolution.DAILY)
+        # RSI for timing: Wilder's averages updated inline in on_data
+        self.rsi_period = 14
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._rsi_count = 0
+        self._rsi = None
         
         # Price and return history
         self.lookback_12m = 252
-        self.price_history = RollingWindow[float](self.lookback_12m + 1)
-        self.return_history = RollingWindow[float](25)
+        # Ring buffer of the last 253 closes; _phead is the next write slot
+        # float32 is plenty for a 12-month price ratio
+        self._prices = np.empty(self.lookback_12m + 1, dtype=np.float32)
+        self._phead = 0
+        self._pcount = 0
+        
+        # Last 20 daily returns with running sums for O(1) realized vol
+        self.vol_window = 20
+        self.return_history = deque(maxlen=self.vol_window)
+        self._ret_sum = 0.0
+        self._ret_sumsq = 0.0
+        self._ann = math.sqrt(252.0)
         
         # === OPTIMIZED PARAMETERS ===
         self.target_vol = 0.22           # Target 22% vol 
@@ -43,6 +99,14 @@ class MSFTBeatBuyHoldV4(QCAlgorithm):
         self.base_leverage = 1.25        # Base leverage
         self.strong_trend_leverage = 1.6 # Leverage for strong trends (up from 1.5)
         self.vol_floor = 0.12            # Min vol assumption
+        self._verbose = False            # Per-trade logging (slows long backtests)
+        self.min_strong_leverage = 1.0   # Floor for strong trends
+        self.moderate_min_leverage = 0.9 # Moderate trend clamp
+        self.moderate_max_leverage = 1.5
+        self.rsi_dip_threshold = 35      # Scale up strong trends on RSI dips
+        self.rsi_dip_mult = 1.15
+        self.rsi_overbought_threshold = 72  # Scale down when overbought
+        self.rsi_overbought_mult = 0.92
         
         # Warmup
         self.set_warm_up(self.lookback_12m + 5, Resolution.DAILY)
@@ -56,6 +120,13 @@ class MSFTBeatBuyHoldV4(QCAlgorithm):
         )
         
         self.last_price = None
+        
+        # Last computed sizing, reused while regime and vol are unchanged
+        self.vol_tolerance = 0.005
+        self._last_regime = None
+        self._last_vol = None
+        self._last_target = 0.0
+        self._last_reason = ""
 
     def on_data(self, data):
         if not data.contains_key("MSFT") or not data["MSFT"]:
@@ -63,30 +134,61 @@ class MSFTBeatBuyHoldV4(QCAlgorithm):
         price = data["MSFT"].close
         if price <= 0:
             return
-        self.price_history.add(price)
+        self._prices[self._phead] = price
+        self._phead = (self._phead + 1) % len(self._prices)
+        self._pcount += 1
         if self.last_price and self.last_price > 0:
-            self.return_history.add((price / self.last_price) - 1)
+            r = (price / self.last_price) - 1
+            if len(self.return_history) == self.vol_window:
+                old = self.return_history[0]
+                self._ret_sum -= old
+                self._ret_sumsq -= old * old
+            self.return_history.append(r)
+            self._ret_sum += r
+            self._ret_sumsq += r * r
+            
+            delta = price - self.last_price
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            n = self.rsi_period
+            self._rsi_count += 1
+            if self._rsi_count <= n:
+                # Seed with the simple average of the first n moves
+                self._avg_gain += (gain - self._avg_gain) / self._rsi_count
+                self._avg_loss += (loss - self._avg_loss) / self._rsi_count
+            else:
+                self._avg_gain = (self._avg_gain * (n - 1) + gain) / n
+                self._avg_loss = (self._avg_loss * (n - 1) + loss) / n
+            if self._rsi_count >= n:
+                if self._avg_loss == 0:
+                    self._rsi = 100.0
+                else:
+                    self._rsi = 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
         self.last_price = price
 
     def get_12m_momentum(self):
-        if self.price_history.count <= self.lookback_12m:
+        if self._pcount <= self.lookback_12m:
             return None
-        return (self.price_history[0] / self.price_history[self.lookback_12m]) - 1
+        # Once full, the slot at _phead holds the oldest close
+        n = len(self._prices)
+        return float(self._prices[(self._phead - 1) % n] / self._prices[self._phead]) - 1
 
     def get_realized_vol(self):
-        if self.return_history.count < 20:
+        n = len(self.return_history)
+        if n < self.vol_window:
             return None
-        returns = [self.return_history[i] for i in range(20)]
-        return np.std(returns) * np.sqrt(252)
+        mean = self._ret_sum / n
+        var = max(0.0, self._ret_sumsq / n - mean * mean)
+        return math.sqrt(var) * self._ann
 
     def rebalance(self):
         if self.is_warming_up:
             return
-        if not self.sma_200.is_ready or not self.sma_50.is_ready:
+        if not self.dual_sma.is_ready:
             return
-        if not self.rsi_indicator.is_ready:
+        if self._rsi is None:
             return
-        if self.price_history.count <= self.lookback_12m:
+        if self._pcount <= self.lookback_12m:
             return
             
         momentum = self.get_12m_momentum()
@@ -95,51 +197,66 @@ class MSFTBeatBuyHoldV4(QCAlgorithm):
         if momentum is None or realized_vol is None:
             return
             
-        current_price = self.price_history[0]
-        sma_200_val = self.sma_200.current.value
-        sma_50_val = self.sma_50.current.value
-        rsi_val = self.rsi_indicator.current.value
+        current_price = self.last_price  # Full-precision latest close
+        sma_200_val = self.dual_sma.sma200
+        sma_50_val = self.dual_sma.sma50
+        rsi_val = self._rsi
         
         above_sma_200 = current_price > sma_200_val
         above_sma_50 = current_price > sma_50_val
         golden_cross = sma_50_val > sma_200_val
         
-        target_position = 0.0
-        reason = ""
-        
         # EXIT CONDITIONS: Must have positive momentum AND be above 200 SMA
-        if momentum <= 0 or not above_sma_200:
-            target_position = 0.0
-            reason = f"EXIT: mom={momentum:.1%}, above_200={above_sma_200}"
+        exit_signal = momentum <= 0 or not above_sma_200
         
         # STRONG UPTREND: All signals aligned (above both SMAs + golden cross)
-        elif above_sma_50 and golden_cross:
+        # MODERATE UPTREND: Above 200 SMA, positive momentum, but not golden cross
+        # Both use one vol-scaled formula; the regime only picks the factors
+        strong = above_sma_50 and golden_cross
+        if strong:
+            leverage = self.strong_trend_leverage
+            lo, hi = self.min_strong_leverage, self.max_leverage
+            # RSI adjustments
+            rsi_mult = (self.rsi_dip_mult if rsi_val < self.rsi_dip_threshold
+                        else self.rsi_overbought_mult if rsi_val > self.rsi_overbought_threshold
+                        else 1.0)
+        else:
+            leverage = self.base_leverage
+            lo, hi = self.moderate_min_leverage, self.moderate_max_leverage
+            rsi_mult = 1.0
+        
+        # Most weeks the regime hasn't flipped and vol has barely moved: reuse the last sizing
+        regime = (exit_signal, strong, rsi_mult)
+        if regime == self._last_regime and abs(realized_vol - self._last_vol) < self.vol_tolerance:
+            target_position = self._last_target
+            reason = self._last_reason
+        else:
             vol_scalar = self.target_vol / max(realized_vol, self.vol_floor)
-            position = self.strong_trend_leverage * vol_scalar
-            position = max(1.0, min(self.max_leverage, position))
+            position = np.clip(leverage * vol_scalar, lo, hi)
+            target_position = 0.0 if exit_signal else float(np.clip(position * rsi_mult, lo, hi))
             
-            # RSI adjustments
-            if rsi_val < 35:
-                position = min(self.max_leverage, position * 1.15)
+            if exit_signal:
+                reason = f"EXIT: mom={momentum:.1%}, above_200={above_sma_200}"
+            elif not strong:
+                reason = f"MODERATE: {target_position:.2f}x"
+            elif rsi_mult > 1.0:
                 reason = f"STRONG + DIP: RSI={rsi_val:.0f}"
-            elif rsi_val > 72:
-                position = max(1.0, position * 0.92)
+            elif rsi_mult < 1.0:
                 reason = f"STRONG + OVERBOUGHT: RSI={rsi_val:.0f}"
             else:
-                reason = f"STRONG TREND: {position:.2f}x"
+                reason = f"STRONG TREND: {target_position:.2f}x"
             
-            target_position = position
-        
-        # MODERATE UPTREND: Above 200 SMA, positive momentum, but not golden cross
-        else:
-            vol_scalar = self.target_vol / max(realized_vol, self.vol_floor)
-            position = self.base_leverage * vol_scalar
-            target_position = max(0.9, min(1.5, position))
-            reason = f"MODERATE: {target_position:.2f}x"
+            self._last_regime = regime
+            self._last_vol = realized_vol
+            self._last_target = target_position
+            self._last_reason = reason
         
         # Execute if position changes meaningfully
-        current = self.portfolio["MSFT"].holdings_value / self.portfolio.total_portfolio_value if self.portfolio.total_portfolio_value > 0 else 0
+        portfolio = self.portfolio
+        total_value = portfolio.total_portfolio_value
+        current = portfolio["MSFT"].holdings_value / total_value if total_value > 0 else 0
         
         if abs(current - target_position) > 0.10:
             self.set_holdings("MSFT", target_position)
-            self.log(f"{reason} | Target: {target_position:.2f}x | Vol: {realized_vol:.1%}")
+            if self._verbose:
+                self.log(f"{reason} | Target: {target_position:.2f}x | Vol: {realized_vol:.1%}")
@@ -39,6 +39,8 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
         self.sma_period = 200  # Trend filter period
         self.top_n = 3  # Number of ETFs to hold
         self.min_etfs = 2  # Minimum ETFs required, else go to safety
+        self.weight_tolerance = 0.02  # Skip trades when already within 2% of target weight
+        self._verbose = False  # Per-rebalance logging (slows long backtests)
         
         # Aggressive/Cyclical sectors - historically perform better Nov-Apr
         # Healthcare, Industrials, Consumer Discretionary, Materials
@@ -54,8 +56,8 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
         # Market regime filter
         self.market_etf = "SPY"
         
-        # Combine all ETFs
-        self.all_etfs = list(set(
+        # Combine all ETFs (dedup keeping first-seen order, so runs are reproducible)
+        self.all_etfs = list(dict.fromkeys(
             self.aggressive_etfs + 
             self.defensive_etfs + 
             self.safety_etfs + 
@@ -63,20 +65,32 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
         ))
         
         # Data structures
-        self.symbol_data = {}
-        self.current_holdings = []  # Track what we currently hold
+        self._held_idx = set()  # Array positions of what we currently hold
         
-        # Add securities and create indicators
+        # Add securities and create indicators, stored as parallel arrays
+        # indexed by position in all_etfs (one slot per ETF)
+        symbols, sma_inds, roc_inds = [], [], []
         for ticker in self.all_etfs:
             symbol = self.add_equity(ticker, Resolution.DAILY).symbol
-            
-            # Create indicators for each symbol
-            self.symbol_data[ticker] = SymbolData(
-                symbol=symbol,
-                momentum=self.mom(symbol, self.lookback_momentum, Resolution.DAILY),
-                sma=self.sma(symbol, self.sma_period, Resolution.DAILY),
-                roc=self.rocp(symbol, self.lookback_momentum, Resolution.DAILY)
-            )
+            symbols.append(symbol)
+            sma_inds.append(self.sma(symbol, self.sma_period, Resolution.DAILY))
+            roc_inds.append(self.rocp(symbol, self.lookback_momentum, Resolution.DAILY))
+        
+        self._tickers = np.array(self.all_etfs)
+        self._index = {ticker: i for i, ticker in enumerate(self.all_etfs)}
+        self._symbols = symbols
+        self._sma_inds = np.array(sma_inds, dtype=object)
+        self._roc_inds = np.array(roc_inds, dtype=object)
+        
+        # Scratch buffers for scoring one seasonal group
+        self._px = np.empty(len(self.all_etfs))
+        self._sma = np.empty_like(self._px)
+        self._roc = np.empty_like(self._px)
+        
+        # Array positions of each seasonal group, fixed for the whole backtest
+        self._winter_idx = np.array([self._index[t] for t in self.aggressive_etfs])
+        self._summer_idx = np.array([self._index[t] for t in self.defensive_etfs])
+        self._safety_idx = np.array([self._index[t] for t in self.safety_etfs])
         
         # Schedule monthly rebalancing on first trading day at market open + 30 min
         self.schedule.on(
@@ -85,9 +99,6 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
             self.rebalance
         )
         
-        # Track last rebalance for logging
-        self.last_rebalance = None
-        
         # Warmup period for indicators
         self.set_warm_up(self.sma_period + 10, Resolution.DAILY)
         
@@ -106,40 +117,47 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
         """
         Market regime filter - check if SPY is above its 200-day SMA
         """
-        spy_data = self.symbol_data[self.market_etf]
-        if not spy_data.sma.is_ready:
+        i = self._index[self.market_etf]
+        sma = self._sma_inds[i]
+        if not sma.is_ready:
             return True  # Default to bullish if indicator not ready
         
-        current_price = self.securities[spy_data.symbol].price
-        return current_price > spy_data.sma.current.value
+        current_price = self.securities[self._symbols[i]].price
+        return current_price > sma.current.value
 
-    def get_etf_scores(self, etf_list):
+    def _score_group(self, idx):
         """
-        Calculate scores for ETFs based on momentum and trend
-        Returns list of (ticker, score) tuples, filtered by trend
+        Score the ETFs at array positions idx by momentum, filtered by trend
+        Returns array positions of the top N, best score first
         """
-        scores = []
-        
-        for ticker in etf_list:
-            data = self.symbol_data[ticker]
+        n = len(idx)
+        prices, sma_vals, rocs = self._px[:n], self._sma[:n], self._roc[:n]
+        securities, symbols = self.securities, self._symbols
+        sma_inds, roc_inds = self._sma_inds, self._roc_inds
+        
+        for k, i in enumerate(idx):
+            sma = sma_inds[i]
+            roc = roc_inds[i]
             
-            # Skip if indicators not ready
-            if not data.momentum.is_ready or not data.sma.is_ready:
+            # Indicators not ready: fail the trend filter below
+            if not roc.is_ready or not sma.is_ready:
+                prices[k], sma_vals[k], rocs[k] = 0.0, np.inf, -np.inf
                 continue
             
-            # Skip if not trading above SMA (trend filter)
-            current_price = self.securities[data.symbol].price
-            if current_price <= data.sma.current.value:
-                continue
-            
-            # Score based on momentum (rate of change)
-            momentum_score = data.roc.current.value if data.roc.is_ready else 0
-            
-            scores.append((ticker, momentum_score))
-        
-        # Sort by score descending
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores
+            prices[k] = securities[symbols[i]].price
+            sma_vals[k] = sma.current.value
+            rocs[k] = roc.current.value
+        
+        # Keep ETFs trading above SMA (trend filter), ranked by momentum (rate of change)
+        mask = prices > sma_vals
+        candidates, scores = idx[mask], -rocs[mask]
+        if len(scores) > self.top_n:
+            # Partial selection of the top N, then order just those
+            top = np.argpartition(scores, self.top_n - 1)[:self.top_n]
+            top = top[np.argsort(scores[top], kind="stable")]
+        else:
+            top = np.argsort(scores, kind="stable")
+        return candidates[top]
 
     def rebalance(self):
         """Monthly rebalancing logic"""
@@ -149,74 +167,70 @@ class SeasonalETFRotationStrategy(QCAlgorithm):
         
         # Determine which seasonal group to use
         is_winter = self.is_winter_season()
-        season_name = "Winter (Aggressive)" if is_winter else "Summer (Defensive)"
-        primary_etfs = self.aggressive_etfs if is_winter else self.defensive_etfs
+        idx = self._winter_idx if is_winter else self._summer_idx
         
         # Check market regime
         market_bullish = self.is_market_bullish()
         
-        self.log(f"\n{'='*50}")
-        self.log(f"Rebalancing - {self.time.strftime('%Y-%m-%d')}")
-        self.log(f"Season: {season_name}")
-        self.log(f"Market Regime: {'Bullish' if market_bullish else 'Bearish'}")
+        if self._verbose:
+            season_name = "Winter (Aggressive)" if is_winter else "Summer (Defensive)"
+            self.log(f"\n{'='*50}")
+            self.log(f"Rebalancing - {self.time.strftime('%Y-%m-%d')}")
+            self.log(f"Season: {season_name}")
+            self.log(f"Market Regime: {'Bullish' if market_bullish else 'Bearish'}")
         
-        # Get scores for primary ETF group
-        etf_scores = self.get_etf_scores(primary_etfs)
+        # Get top N scoring ETFs from primary group
+        top_picks = self._score_group(idx)
         
-        self.log(f"ETF Scores: {etf_scores}")
+        if self._verbose:
+            self.log(f"ETF Scores: {list(zip(self._tickers[idx].tolist(), self._roc[:len(idx)].tolist()))}")
         
         # Determine holdings
-        target_holdings = []
-        
-        if market_bullish and len(etf_scores) >= self.min_etfs:
+        # top_n >= min_etfs, so the picks cover the min_etfs check
+        if market_bullish and len(top_picks) >= self.min_etfs:
             # Normal operation - hold top N from seasonal group
-            target_holdings = [ticker for ticker, _ in etf_scores[:self.top_n]]
-            self.log(f"Selected ETFs: {target_holdings}")
+            target_idx = top_picks.tolist()
+            if self._verbose:
+                self.log(f"Selected ETFs: {self._tickers[target_idx].tolist()}")
         else:
             # Safety mode - rotate to bonds
             # Prefer TLT in falling rate environment, SHY in rising rate
             # For simplicity, use both equally
-            target_holdings = self.safety_etfs
-            self.log(f"Safety Mode - Holding: {target_holdings}")
+            target_idx = self._safety_idx.tolist()
+            if self._verbose:
+                self.log(f"Safety Mode - Holding: {self.safety_etfs}")
         
         # Calculate target weights
-        weight = 1.0 / len(target_holdings) if target_holdings else 0
+        weight = 1.0 / len(target_idx) if target_idx else 0
+        target_set = set(target_idx)
         
         # Liquidate positions not in target
-        for ticker in self.current_holdings:
-            if ticker not in target_holdings:
-                symbol = self.symbol_data[ticker].symbol
-                if self.portfolio[symbol].invested:
-                    self.liquidate(symbol)
-                    self.log(f"Liquidated: {ticker}")
-        
-        # Set target positions
-        for ticker in target_holdings:
-            symbol = self.symbol_data[ticker].symbol
+        for i in self._held_idx - target_set:
+            symbol = self._symbols[i]
+            if self.portfolio[symbol].invested:
+                self.liquidate(symbol)
+                if self._verbose:
+                    self.log(f"Liquidated: {self._tickers[i]}")
+        
+        # Set target positions, skipping ETFs already near their target weight
+        portfolio = self.portfolio
+        total_value = portfolio.total_portfolio_value
+        for i in target_idx:
+            symbol = self._symbols[i]
+            current_w = portfolio[symbol].holdings_value / total_value if total_value > 0 else 0
+            if abs(current_w - weight) <= self.weight_tolerance:
+                continue
             self.set_holdings(symbol, weight)
-            self.log(f"Set {ticker} to {weight*100:.1f}%")
+            if self._verbose:
+                self.log(f"Set {self._tickers[i]} to {weight*100:.1f}%")
         
         # Update current holdings tracker
-        self.current_holdings = target_holdings.copy()
+        self._held_idx = target_set
         
-        self.last_rebalance = self.time
-        self.log(f"{'='*50}\n")
-
-    def on_data(self, data: Slice):
-        """Called on each data slice - not used for trading but can add logging"""
-        pass
+        if self._verbose:
+            self.log(f"{'='*50}\n")
 
     def on_end_of_algorithm(self):
         """Final summary"""
         self.log(f"\nAlgorithm completed.")
         self.log(f"Final portfolio value: ${self.portfolio.total_portfolio_value:,.2f}")
-
-
-class SymbolData:
-    """Container for symbol-specific data and indicators"""
-    
-    def __init__(self, symbol, momentum, sma, roc):
-        self.symbol = symbol
-        self.momentum = momentum
-        self.sma = sma
-        self.roc = roc